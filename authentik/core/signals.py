@@ -1,9 +1,10 @@
 """authentik core signals"""
 from typing import TYPE_CHECKING
 
+from django.conf import settings
 from django.contrib.auth.signals import user_logged_in, user_logged_out
 from django.contrib.sessions.backends.cache import KEY_PREFIX
-from django.core.cache import cache
+from django.core.cache import cache, caches
 from django.core.signals import Signal
 from django.db.models import Model
 from django.db.models.signals import post_save, pre_delete
@@ -64,4 +65,4 @@ def authenticated_session_delete(sender: type[Model], instance: "AuthenticatedSe
         return
 
     cache_key = f"{KEY_PREFIX}{instance.session_key}"
-    cache.delete(cache_key)
+    caches[settings.SESSION_CACHE_ALIAS].delete(cache_key)
@@ -1,8 +1,9 @@
 """authentik core tasks"""
 from datetime import datetime, timedelta
 
+from django.conf import settings
 from django.contrib.sessions.backends.cache import KEY_PREFIX
-from django.core.cache import cache
+from django.core.cache import caches
 from django.utils.timezone import now
 from structlog.stdlib import get_logger
 
@@ -41,9 +42,10 @@ def clean_expired_models(self: MonitoredTask):
         messages.append(f"Expired {amount} {cls._meta.verbose_name_plural}")
     # Special case
     amount = 0
+    session_cache = caches[settings.SESSION_CACHE_ALIAS]
     for session in AuthenticatedSession.objects.all():
         cache_key = f"{KEY_PREFIX}{session.session_key}"
-        value = cache.get(cache_key)
+        value = session_cache.get(cache_key)
         if not value:
             session.delete()
             amount += 1
@@ -24,7 +24,7 @@ class FlowTestCase(APITestCase):
     ) -> dict[str, Any]:
         """Assert various attributes of a stage response"""
         self.assertEqual(response.status_code, 200)
-        raw_response = loads(response.content.decode())
+        raw_response = loads(response.content)
         self.assertIsNotNone(raw_response["component"])
         self.assertIsNotNone(raw_response["type"])
         if flow:
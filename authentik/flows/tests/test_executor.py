@@ -1,14 +1,20 @@
 """flow views tests"""
+from importlib import import_module
+from typing import Optional
 from unittest.mock import MagicMock, PropertyMock, patch
 
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.backends.base import SessionBase
 from django.http import HttpRequest, HttpResponse
-from django.test.client import RequestFactory
 from django.urls import reverse
+from rest_framework.test import APIRequestFactory
 
 from authentik.core.models import User
 from authentik.core.tests.utils import create_test_flow
 from authentik.flows.markers import ReevaluateMarker, StageMarker
 from authentik.flows.models import (
+    Flow,
     FlowDeniedAction,
     FlowDesignation,
     FlowStageBinding,
@@ -18,7 +24,6 @@ from authentik.flows.planner import FlowPlan, FlowPlanner
 from authentik.flows.stage import PLAN_CONTEXT_PENDING_USER_IDENTIFIER, StageView
 from authentik.flows.tests import FlowTestCase
 from authentik.flows.views.executor import NEXT_ARG_NAME, SESSION_KEY_PLAN, FlowExecutorView
-from authentik.lib.config import CONFIG
 from authentik.lib.generators import generate_id
 from authentik.policies.dummy.models import DummyPolicy
 from authentik.policies.models import PolicyBinding
@@ -29,7 +34,17 @@ from authentik.stages.dummy.models import DummyStage
 from authentik.stages.identification.models import IdentificationStage, UserFields
 
 POLICY_RETURN_FALSE = PropertyMock(return_value=PolicyResult(False, "foo"))
-POLICY_RETURN_TRUE = MagicMock(return_value=PolicyResult(True))
+
+
+def policy_return_true(*args, **kwargs) -> PolicyResult:
+    """Replacement for DummyPolicy.passes which always passes"""
+    return PolicyResult(True)
+
+
+# Used as context manager, as the tests need to stop it halfway through
+POLICY_PASSES_PATCH = patch(
+    "authentik.policies.dummy.models.DummyPolicy.passes", policy_return_true
+)
 
 
 def to_stage_response(request: HttpRequest, source: HttpResponse):
@@ -38,57 +53,149 @@ def to_stage_response(request: HttpRequest, source: HttpResponse):
     return source
 
 
-TO_STAGE_RESPONSE_MOCK = MagicMock(side_effect=to_stage_response)
+# Only some tests replace to_stage_response, others check the converted challenge responses,
+# hence this can't be patched for the whole class. The patcher is created once and re-used.
+TO_STAGE_RESPONSE_PATCH = patch(
+    "authentik.flows.views.executor.to_stage_response",
+    to_stage_response,
+)
+
+EXECUTOR_MIDDLEWARE = [
+    "authentik.root.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "authentik.core.middleware.RequestIDMiddleware",
+    "authentik.tenants.middleware.TenantMiddleware",
+]
 
 
 class TestFlowExecutor(FlowTestCase):
     """Test executor"""
 
-    def setUp(self):
-        self.request_factory = RequestFactory()
+    request_factory = APIRequestFactory()
+    # Same as in the URLconf, build the view function once instead of for every request
+    executor_view = staticmethod(FlowExecutorView.as_view())
 
-    @patch(
-        "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
-    )
-    def test_existing_plan_diff_flow(self):
-        """Check that a plan for a different flow cancels the current plan"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.flow = create_test_flow(
+            FlowDesignation.AUTHENTICATION,
+        )
+        cls.flow_continue = create_test_flow(
+            FlowDesignation.AUTHENTICATION,
+            denied_action=FlowDeniedAction.CONTINUE,
+        )
+        cls.dummy1 = DummyStage.objects.create(name=generate_id())
+        cls.dummy2 = DummyStage.objects.create(name=generate_id())
+        cls.dummy3 = DummyStage.objects.create(name=generate_id())
+        cls.dummy4 = DummyStage.objects.create(name=generate_id())
+        cls.false_policy = DummyPolicy.objects.create(
+            name=generate_id(), result=False, wait_min=1, wait_max=2
+        )
+        cls.true_policy = DummyPolicy.objects.create(
+            name=generate_id(), result=True, wait_min=1, wait_max=2
+        )
+        cls.flow_multi = create_test_flow(
+            FlowDesignation.AUTHENTICATION,
+        )
+        FlowStageBinding.objects.create(target=cls.flow_multi, stage=cls.dummy1, order=0)
+        FlowStageBinding.objects.create(target=cls.flow_multi, stage=cls.dummy2, order=1)
+        cls.exec_url_map = {
+            flow.slug: reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
+            for flow in (cls.flow, cls.flow_continue, cls.flow_multi)
+        }
+        cls.root_redirect_url = reverse("authentik_core:root-redirect")
+
+    def setUp(self):
+        self.session_key = None
+
+    @property
+    def session(self) -> SessionBase:
+        """Session used by `execute`, loaded fresh from the session store every time"""
+        engine = import_module(settings.SESSION_ENGINE)
+        session = engine.SessionStore(self.session_key)
+        if not self.session_key:
+            session.save()
+            self.session_key = session.session_key
+        return session
+
+    def execute(self, method: str, flow: Flow, data: Optional[dict] = None) -> HttpResponse:
+        """Dispatch a request straight to the FlowExecutorView without going through the
+        middleware stack, persisting the session between requests like the test client"""
+        url = self.exec_url_map.get(flow.slug)
+        if not url:
+            # Flows created within a test are added on their first request. TestCase copies
+            # setUpTestData attributes for every test, so they don't leak into other tests
+            url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
+            self.exec_url_map[flow.slug] = url
+        request = getattr(self.request_factory, method)(url, data)
+        request.session = self.session
+        request.user = AnonymousUser()
+        response = self.executor_view(request, flow_slug=flow.slug)
+        request.session.save()
+        self.session_key = request.session.session_key
+        return response
+
+    # pylint: disable=invalid-name
+    def assertPlan(
+        self,
+        plan: FlowPlan,
+        bindings: list[FlowStageBinding],
+        markers: list[type[StageMarker]],
+    ):
+        """Check the plan's bindings, and that each marker is an instance of the given type"""
+        self.assertEqual(plan.bindings, bindings)
+        self.assertEqual(len(plan.markers), len(markers))
+        for idx, (marker, marker_type) in enumerate(zip(plan.markers, markers)):
+            with self.subTest(marker=idx):
+                self.assertIsInstance(marker, marker_type)
+
+    def create_reevaluate_flow(
+        self, *, policy_result: bool, stages: int, reevaluate: tuple[int, ...]
+    ) -> tuple[Flow, list[FlowStageBinding]]:
+        """Create a flow with `stages` dummy stages. The bindings at the indices in
+        `reevaluate` are re-evaluated and get a dummy policy returning `policy_result`"""
         flow = create_test_flow(
             FlowDesignation.AUTHENTICATION,
         )
-        stage = DummyStage.objects.create(name=generate_id())
-        binding = FlowStageBinding(target=flow, stage=stage, order=0)
+        policy = self.true_policy if policy_result else self.false_policy
+        dummy_stages = (self.dummy1, self.dummy2, self.dummy3, self.dummy4)
+        bindings = [
+            FlowStageBinding.objects.create(
+                target=flow, stage=stage, order=idx, re_evaluate_policies=idx in reevaluate
+            )
+            for idx, stage in enumerate(dummy_stages[:stages])
+        ]
+        PolicyBinding.objects.bulk_create(
+            [PolicyBinding(policy=policy, target=bindings[idx], order=0) for idx in reevaluate]
+        )
+        return flow, bindings
+
+    @TO_STAGE_RESPONSE_PATCH
+    def test_existing_plan_diff_flow(self):
+        """Check that a plan for a different flow cancels the current plan"""
+        flow = self.flow
+        binding = FlowStageBinding(target=flow, stage=self.dummy1, order=0)
         plan = FlowPlan(flow_pk=flow.pk.hex + "a", bindings=[binding], markers=[StageMarker()])
-        session = self.client.session
+        session = self.session
         session[SESSION_KEY_PLAN] = plan
         session.save()
 
         cancel_mock = MagicMock()
         with patch("authentik.flows.views.executor.FlowExecutorView.cancel", cancel_mock):
-            response = self.client.get(
-                reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug}),
-            )
+            response = self.execute("get", flow)
             self.assertEqual(response.status_code, 302)
             self.assertEqual(cancel_mock.call_count, 2)
 
-    @patch(
-        "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
-    )
+    @TO_STAGE_RESPONSE_PATCH
     @patch(
         "authentik.policies.engine.PolicyEngine.result",
         POLICY_RETURN_FALSE,
     )
     def test_invalid_non_applicable_flow(self):
         """Tests that a non-applicable flow returns the correct error message"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
+        flow = self.flow
 
-        CONFIG.update_from_dict({"domain": "testserver"})
-        response = self.client.get(
-            reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug}),
-        )
+        response = self.execute("get", flow)
         self.assertStageResponse(
             response,
             flow=flow,
@@ -96,356 +203,205 @@ class TestFlowExecutor(FlowTestCase):
             component="ak-stage-access-denied",
         )
 
-    @patch(
-        "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
-    )
+    @TO_STAGE_RESPONSE_PATCH
     @patch(
         "authentik.policies.engine.PolicyEngine.result",
         POLICY_RETURN_FALSE,
     )
     def test_invalid_non_applicable_flow_continue(self):
         """Tests that a non-applicable flow that should redirect"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-            denied_action=FlowDeniedAction.CONTINUE,
-        )
+        flow = self.flow_continue
 
-        CONFIG.update_from_dict({"domain": "testserver"})
-        response = self.client.get(
-            reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug}),
-        )
+        response = self.execute("get", flow)
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse("authentik_core:root-redirect"))
+        self.assertEqual(response.url, self.root_redirect_url)
 
-    @patch(
-        "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
-    )
+    @TO_STAGE_RESPONSE_PATCH
     def test_invalid_flow_redirect(self):
         """Tests that an invalid flow still redirects"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
+        flow = self.flow
 
-        CONFIG.update_from_dict({"domain": "testserver"})
         dest = "/unique-string"
-        url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
-        response = self.client.get(url + f"?{NEXT_ARG_NAME}={dest}")
+        response = self.execute("get", flow, {NEXT_ARG_NAME: dest})
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse("authentik_core:root-redirect"))
+        self.assertEqual(response.url, self.root_redirect_url)
 
-    @patch(
-        "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
-    )
+    @TO_STAGE_RESPONSE_PATCH
     def test_invalid_empty_flow(self):
         """Tests that an empty flow returns the correct error message"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
+        flow = self.flow
 
-        CONFIG.update_from_dict({"domain": "testserver"})
-        response = self.client.get(
-            reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug}),
-        )
+        response = self.execute("get", flow)
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse("authentik_core:root-redirect"))
+        self.assertEqual(response.url, self.root_redirect_url)
 
     def test_multi_stage_flow(self):
         """Test a full flow with multiple stages"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
-        FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
-        )
-        FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=1
-        )
+        flow = self.flow_multi
 
-        exec_url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
+        exec_url = self.exec_url_map[flow.slug]
         # First Request, start planning, renders form
-        response = self.client.get(exec_url)
+        response = self.execute("get", flow)
         self.assertEqual(response.status_code, 200)
         # Check that two stages are in plan
-        session = self.client.session
-        plan: FlowPlan = session[SESSION_KEY_PLAN]
+        plan: FlowPlan = self.session[SESSION_KEY_PLAN]
         self.assertEqual(len(plan.bindings), 2)
         # Second request, submit form, one stage left
-        response = self.client.post(exec_url)
+        response = self.execute("post", flow)
         # Second request redirects to the same URL
         self.assertEqual(response.status_code, 302)
         self.assertEqual(response.url, exec_url)
         # Check that two stages are in plan
-        session = self.client.session
-        plan: FlowPlan = session[SESSION_KEY_PLAN]
+        plan: FlowPlan = self.session[SESSION_KEY_PLAN]
         self.assertEqual(len(plan.bindings), 1)
 
-    @patch(
-        "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
-    )
+    @TO_STAGE_RESPONSE_PATCH
     def test_reevaluate_remove_last(self):
         """Test planner with re-evaluate (last stage is removed)"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
-        false_policy = DummyPolicy.objects.create(
-            name=generate_id(), result=False, wait_min=1, wait_max=2
+        flow, (binding, binding2) = self.create_reevaluate_flow(
+            policy_result=False, stages=2, reevaluate=(1,)
         )
 
-        binding = FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
-        )
-        binding2 = FlowStageBinding.objects.create(
-            target=flow,
-            stage=DummyStage.objects.create(name=generate_id()),
-            order=1,
-            re_evaluate_policies=True,
-        )
-
-        PolicyBinding.objects.create(policy=false_policy, target=binding2, order=0)
-
         # Here we patch the dummy policy to evaluate to true so the stage is included
-        with patch("authentik.policies.dummy.models.DummyPolicy.passes", POLICY_RETURN_TRUE):
+        with POLICY_PASSES_PATCH:
 
-            exec_url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
             # First request, run the planner
-            response = self.client.get(exec_url)
+            response = self.execute("get", flow)
             self.assertEqual(response.status_code, 200)
 
-            plan: FlowPlan = self.client.session[SESSION_KEY_PLAN]
+            plan: FlowPlan = self.session[SESSION_KEY_PLAN]
 
-            self.assertEqual(plan.bindings[0], binding)
-            self.assertEqual(plan.bindings[1], binding2)
-
-            self.assertIsInstance(plan.markers[0], StageMarker)
-            self.assertIsInstance(plan.markers[1], ReevaluateMarker)
+            self.assertPlan(plan, [binding, binding2], [StageMarker, ReevaluateMarker])
 
             # Second request, this passes the first dummy stage
-            response = self.client.post(exec_url)
+            response = self.execute("post", flow)
             self.assertEqual(response.status_code, 302)
 
         # third request, this should trigger the re-evaluate
         # We do this request without the patch, so the policy results in false
-        response = self.client.post(exec_url)
+        response = self.execute("post", flow)
         self.assertEqual(response.status_code, 302)
-        self.assertEqual(response.url, reverse("authentik_core:root-redirect"))
+        self.assertEqual(response.url, self.root_redirect_url)
 
     def test_reevaluate_remove_middle(self):
         """Test planner with re-evaluate (middle stage is removed)"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
-        false_policy = DummyPolicy.objects.create(
-            name=generate_id(), result=False, wait_min=1, wait_max=2
-        )
-
-        binding = FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
+        flow, (binding, binding2, binding3) = self.create_reevaluate_flow(
+            policy_result=False, stages=3, reevaluate=(1,)
         )
-        binding2 = FlowStageBinding.objects.create(
-            target=flow,
-            stage=DummyStage.objects.create(name=generate_id()),
-            order=1,
-            re_evaluate_policies=True,
-        )
-        binding3 = FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=2
-        )
-
-        PolicyBinding.objects.create(policy=false_policy, target=binding2, order=0)
 
         # Here we patch the dummy policy to evaluate to true so the stage is included
-        with patch("authentik.policies.dummy.models.DummyPolicy.passes", POLICY_RETURN_TRUE):
+        with POLICY_PASSES_PATCH:
 
-            exec_url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
             # First request, run the planner
-            response = self.client.get(exec_url)
+            response = self.execute("get", flow)
 
             self.assertEqual(response.status_code, 200)
-            plan: FlowPlan = self.client.session[SESSION_KEY_PLAN]
-
-            self.assertEqual(plan.bindings[0], binding)
-            self.assertEqual(plan.bindings[1], binding2)
-            self.assertEqual(plan.bindings[2], binding3)
+            plan: FlowPlan = self.session[SESSION_KEY_PLAN]
 
-            self.assertIsInstance(plan.markers[0], StageMarker)
-            self.assertIsInstance(plan.markers[1], ReevaluateMarker)
-            self.assertIsInstance(plan.markers[2], StageMarker)
+            self.assertPlan(
+                plan, [binding, binding2, binding3], [StageMarker, ReevaluateMarker, StageMarker]
+            )
 
             # Second request, this passes the first dummy stage
-            response = self.client.post(exec_url)
+            response = self.execute("post", flow)
             self.assertEqual(response.status_code, 302)
 
-            plan: FlowPlan = self.client.session[SESSION_KEY_PLAN]
+            plan: FlowPlan = self.session[SESSION_KEY_PLAN]
 
-            self.assertEqual(plan.bindings[0], binding2)
-            self.assertEqual(plan.bindings[1], binding3)
-
-            self.assertIsInstance(plan.markers[0], StageMarker)
-            self.assertIsInstance(plan.markers[1], StageMarker)
+            self.assertPlan(plan, [binding2, binding3], [StageMarker, StageMarker])
 
         # third request, this should trigger the re-evaluate
         # We do this request without the patch, so the policy results in false
-        response = self.client.post(exec_url)
+        response = self.execute("post", flow)
         self.assertEqual(response.status_code, 200)
-        self.assertStageRedirects(response, reverse("authentik_core:root-redirect"))
+        self.assertStageRedirects(response, self.root_redirect_url)
 
     def test_reevaluate_keep(self):
         """Test planner with re-evaluate (everything is kept)"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
-        true_policy = DummyPolicy.objects.create(
-            name=generate_id(), result=True, wait_min=1, wait_max=2
-        )
-
-        binding = FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
-        )
-        binding2 = FlowStageBinding.objects.create(
-            target=flow,
-            stage=DummyStage.objects.create(name=generate_id()),
-            order=1,
-            re_evaluate_policies=True,
+        flow, (binding, binding2, binding3) = self.create_reevaluate_flow(
+            policy_result=True, stages=3, reevaluate=(1,)
         )
-        binding3 = FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=2
-        )
-
-        PolicyBinding.objects.create(policy=true_policy, target=binding2, order=0)
 
         # Here we patch the dummy policy to evaluate to true so the stage is included
-        with patch("authentik.policies.dummy.models.DummyPolicy.passes", POLICY_RETURN_TRUE):
+        with POLICY_PASSES_PATCH:
 
-            exec_url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
             # First request, run the planner
-            response = self.client.get(exec_url)
+            response = self.execute("get", flow)
 
             self.assertEqual(response.status_code, 200)
-            plan: FlowPlan = self.client.session[SESSION_KEY_PLAN]
-
-            self.assertEqual(plan.bindings[0], binding)
-            self.assertEqual(plan.bindings[1], binding2)
-            self.assertEqual(plan.bindings[2], binding3)
+            plan: FlowPlan = self.session[SESSION_KEY_PLAN]
 
-            self.assertIsInstance(plan.markers[0], StageMarker)
-            self.assertIsInstance(plan.markers[1], ReevaluateMarker)
-            self.assertIsInstance(plan.markers[2], StageMarker)
+            self.assertPlan(
+                plan, [binding, binding2, binding3], [StageMarker, ReevaluateMarker, StageMarker]
+            )
 
             # Second request, this passes the first dummy stage
-            response = self.client.post(exec_url)
+            response = self.execute("post", flow)
             self.assertEqual(response.status_code, 302)
 
-            plan: FlowPlan = self.client.session[SESSION_KEY_PLAN]
-
-            self.assertEqual(plan.bindings[0], binding2)
-            self.assertEqual(plan.bindings[1], binding3)
+            plan: FlowPlan = self.session[SESSION_KEY_PLAN]
 
-            self.assertIsInstance(plan.markers[0], StageMarker)
-            self.assertIsInstance(plan.markers[1], StageMarker)
+            self.assertPlan(plan, [binding2, binding3], [StageMarker, StageMarker])
 
             # Third request, this passes the first dummy stage
-            response = self.client.post(exec_url)
+            response = self.execute("post", flow)
             self.assertEqual(response.status_code, 302)
 
-            plan: FlowPlan = self.client.session[SESSION_KEY_PLAN]
-
-            self.assertEqual(plan.bindings[0], binding3)
+            plan: FlowPlan = self.session[SESSION_KEY_PLAN]
 
-            self.assertIsInstance(plan.markers[0], StageMarker)
+            self.assertPlan(plan, [binding3], [StageMarker])
 
         # third request, this should trigger the re-evaluate
         # We do this request without the patch, so the policy results in false
-        response = self.client.post(exec_url)
+        response = self.execute("post", flow)
         self.assertEqual(response.status_code, 200)
-        self.assertStageRedirects(response, reverse("authentik_core:root-redirect"))
+        self.assertStageRedirects(response, self.root_redirect_url)
 
     def test_reevaluate_remove_consecutive(self):
         """Test planner with re-evaluate (consecutive stages are removed)"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
-        false_policy = DummyPolicy.objects.create(
-            name=generate_id(), result=False, wait_min=1, wait_max=2
-        )
-
-        binding = FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
+        flow, (binding, binding2, binding3, binding4) = self.create_reevaluate_flow(
+            policy_result=False, stages=4, reevaluate=(1, 2)
         )
-        binding2 = FlowStageBinding.objects.create(
-            target=flow,
-            stage=DummyStage.objects.create(name=generate_id()),
-            order=1,
-            re_evaluate_policies=True,
-        )
-        binding3 = FlowStageBinding.objects.create(
-            target=flow,
-            stage=DummyStage.objects.create(name=generate_id()),
-            order=2,
-            re_evaluate_policies=True,
-        )
-        binding4 = FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=2
-        )
-
-        PolicyBinding.objects.create(policy=false_policy, target=binding2, order=0)
-        PolicyBinding.objects.create(policy=false_policy, target=binding3, order=0)
 
         # Here we patch the dummy policy to evaluate to true so the stage is included
-        with patch("authentik.policies.dummy.models.DummyPolicy.passes", POLICY_RETURN_TRUE):
+        with POLICY_PASSES_PATCH:
 
-            exec_url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
             # First request, run the planner
-            response = self.client.get(exec_url)
+            response = self.execute("get", flow)
             self.assertEqual(response.status_code, 200)
             self.assertStageResponse(response, flow, component="ak-stage-dummy")
 
-            plan: FlowPlan = self.client.session[SESSION_KEY_PLAN]
-
-            self.assertEqual(plan.bindings[0], binding)
-            self.assertEqual(plan.bindings[1], binding2)
-            self.assertEqual(plan.bindings[2], binding3)
-            self.assertEqual(plan.bindings[3], binding4)
+            plan: FlowPlan = self.session[SESSION_KEY_PLAN]
 
-            self.assertIsInstance(plan.markers[0], StageMarker)
-            self.assertIsInstance(plan.markers[1], ReevaluateMarker)
-            self.assertIsInstance(plan.markers[2], ReevaluateMarker)
-            self.assertIsInstance(plan.markers[3], StageMarker)
+            self.assertPlan(
+                plan,
+                [binding, binding2, binding3, binding4],
+                [StageMarker, ReevaluateMarker, ReevaluateMarker, StageMarker],
+            )
 
         # Second request, this passes the first dummy stage
-        response = self.client.post(exec_url)
+        response = self.execute("post", flow)
         self.assertEqual(response.status_code, 302)
 
         # third request, this should trigger the re-evaluate
         # A get request will evaluate the policies and this will return stage 4
         # but it won't save it, hence we can't check the plan
-        response = self.client.get(exec_url)
+        response = self.execute("get", flow)
         self.assertStageResponse(response, flow, component="ak-stage-dummy")
 
         # fourth request, this confirms the last stage (dummy4)
         # We do this request without the patch, so the policy results in false
-        response = self.client.post(exec_url)
+        response = self.execute("post", flow)
         self.assertEqual(response.status_code, 200)
-        self.assertStageRedirects(response, reverse("authentik_core:root-redirect"))
+        self.assertStageRedirects(response, self.root_redirect_url)
 
     def test_stageview_user_identifier(self):
         """Test PLAN_CONTEXT_PENDING_USER_IDENTIFIER"""
-        flow = create_test_flow(
-            FlowDesignation.AUTHENTICATION,
-        )
-        FlowStageBinding.objects.create(
-            target=flow, stage=DummyStage.objects.create(name=generate_id()), order=0
-        )
-
+        flow = self.flow_multi
         ident = "test-identifier"
 
         user = User.objects.create(username="test-user")
-        request = self.request_factory.get(
-            reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug}),
-        )
+        request = self.request_factory.get(self.exec_url_map[flow.slug])
         request.user = user
         planner = FlowPlanner(flow)
         plan = planner.plan(request, default_context={PLAN_CONTEXT_PENDING_USER_IDENTIFIER: ident})
@@ -489,17 +445,19 @@ class TestFlowExecutor(FlowTestCase):
             invalid_response_action=InvalidResponseAction.RESTART_WITH_CONTEXT,
         )
         exec_url = reverse("authentik_api:flow-executor", kwargs={"flow_slug": flow.slug})
-        # First request, run the planner
-        response = self.client.get(exec_url)
-        self.assertStageResponse(
-            response,
-            flow,
-            component="ak-stage-identification",
-            password_fields=False,
-            primary_action="Log in",
-            sources=[],
-            show_source_labels=False,
-            user_fields=[UserFields.E_MAIL],
-        )
-        response = self.client.post(exec_url, {"uid_field": "invalid-string"}, follow=True)
-        self.assertStageResponse(response, flow, component="ak-stage-access-denied")
+        # Only the middleware FlowExecutorView and the stages rely on is needed
+        with self.settings(MIDDLEWARE=EXECUTOR_MIDDLEWARE):
+            # First request, run the planner
+            response = self.client.get(exec_url)
+            self.assertStageResponse(
+                response,
+                flow,
+                component="ak-stage-identification",
+                password_fields=False,
+                primary_action="Log in",
+                sources=[],
+                show_source_labels=False,
+                user_fields=[UserFields.E_MAIL],
+            )
+            response = self.client.post(exec_url, {"uid_field": "invalid-string"}, follow=True)
+            self.assertStageResponse(response, flow, component="ak-stage-access-denied")
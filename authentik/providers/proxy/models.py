@@ -1,6 +1,6 @@
 """authentik proxy models"""
 import string
-from random import SystemRandom
+from secrets import choice
 from typing import Iterable, Optional
 from urllib.parse import urljoin
 
@@ -16,10 +16,12 @@ from authentik.providers.oauth2.models import ClientTypes, OAuth2Provider, Scope
 SCOPE_AK_PROXY = "ak_proxy"
 OUTPOST_CALLBACK_SIGNATURE = "X-authentik-auth-callback"
 
+_ALPHABET = string.ascii_uppercase + string.digits
+
 
 def get_cookie_secret():
     """Generate random 32-character string for cookie-secret"""
-    return "".join(SystemRandom().choice(string.ascii_uppercase + string.digits) for _ in range(32))
+    return "".join(choice(_ALPHABET) for _ in range(32))
 
 
 def _get_callback_url(uri: str) -> str:
@@ -1,12 +1,6 @@
 """Integrate ./manage.py test with pytest"""
 from argparse import ArgumentParser
 
-from django.conf import settings
-
-from authentik.lib.config import CONFIG
-from authentik.lib.sentry import sentry_init
-from tests.e2e.utils import get_docker_tag
-
 
 class PytestTestRunner:  # pragma: no cover
     """Runs pytest to discover and run tests."""
@@ -15,36 +9,37 @@ class PytestTestRunner:  # pragma: no cover
         self.verbosity = verbosity
         self.failfast = failfast
         self.keepdb = keepdb
+        self.parallel = kwargs.get("parallel", False)
 
         self.args = ["-vv"]
         if self.failfast:
             self.args.append("--exitfirst")
         if self.keepdb:
             self.args.append("--reuse-db")
+        if kwargs.get("no_migrations", False):
+            self.args.append("--no-migrations")
 
         if kwargs.get("randomly_seed", None):
             self.args.append(f"--randomly-seed={kwargs['randomly_seed']}")
 
-        settings.TEST = True
-        settings.CELERY_TASK_ALWAYS_EAGER = True
-        CONFIG.y_set("avatars", "none")
-        CONFIG.y_set("geoip", "tests/GeoLite2-City-Test.mmdb")
-        CONFIG.y_set("blueprints_dir", "./blueprints")
-        CONFIG.y_set(
-            "outposts.container_image_base",
-            f"ghcr.io/goauthentik/dev-%(type)s:{get_docker_tag()}",
-        )
-        CONFIG.y_set("error_reporting.sample_rate", 1.0)
-        sentry_init(
-            environment="testing",
-            send_default_pii=True,
-        )
-
     @classmethod
     def add_arguments(cls, parser: ArgumentParser):
         """Add more pytest-specific arguments"""
         parser.add_argument("--randomly-seed", type=int)
         parser.add_argument("--keepdb", action="store_true")
+        parser.add_argument(
+            "--parallel",
+            action="store_true",
+            help="Run unit tests in multiple processes, keeping all tests of a file on one worker",
+        )
+        parser.add_argument(
+            "--no-migrations",
+            action="store_true",
+            help=(
+                "Create the test database directly from the models. Objects created by "
+                "data migrations, like the default user and blueprints, won't exist"
+            ),
+        )
 
     def run_tests(self, test_labels):
         """Run pytest and return the exitcode.
@@ -56,5 +51,13 @@ class PytestTestRunner:  # pragma: no cover
 
         if any("tests/e2e" in label for label in test_labels):
             self.args.append("-pno:randomly")
+        # e2e and integration tests share containers and live servers, so only unit tests
+        # are split up, which requires all labels to point into the authentik package
+        elif (
+            self.parallel
+            and test_labels
+            and all(label.startswith("authentik") for label in test_labels)
+        ):
+            self.args.extend(["-n", "auto", "--dist=loadfile"])
         self.args.extend(test_labels)
         return pytest.main(self.args)
@@ -0,0 +1,34 @@
+"""authentik test settings"""
+# pylint: disable=wildcard-import,unused-wildcard-import
+from authentik.lib.config import CONFIG
+from authentik.lib.sentry import sentry_init
+from authentik.root.settings import *  # noqa: F401,F403
+from tests import get_docker_tag
+
+# These are set here instead of in the test runner, so that pytest-xdist workers,
+# which load the settings module on their own, are configured the same way
+TEST = True
+CELERY_TASK_ALWAYS_EAGER = True
+CONFIG.y_set("avatars", "none")
+CONFIG.y_set("geoip", "tests/GeoLite2-City-Test.mmdb")
+CONFIG.y_set("blueprints_dir", "./blueprints")
+CONFIG.y_set("error_reporting.sample_rate", 1.0)
+CONFIG.y_set(
+    "outposts.container_image_base",
+    f"ghcr.io/goauthentik/dev-%(type)s:{get_docker_tag()}",
+)
+sentry_init(
+    environment="testing",
+    send_default_pii=True,
+)
+
+# Sessions only need to live as long as the test process, keep them in memory instead of
+# doing a redis roundtrip for every session load and save
+CACHES["sessions"] = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+SESSION_CACHE_ALIAS = "sessions"
+
+# The test database is thrown away after the run, so don't wait for WAL flushes on commit.
+# This only speeds up actual commits, like the ones from migrate, TransactionTestCase and
+# the e2e tests; TestCase rolls back every test and never commits.
+# SQLite can't be used instead, as several models use Postgres-only fields like ArrayField
+DATABASES["default"].setdefault("OPTIONS", {})["options"] = "-c synchronous_commit=off"
@@ -11,7 +11,7 @@ from authentik.flows.markers import StageMarker
 from authentik.flows.models import FlowDesignation, FlowStageBinding
 from authentik.flows.planner import PLAN_CONTEXT_PENDING_USER, FlowPlan
 from authentik.flows.tests import FlowTestCase
-from authentik.flows.tests.test_executor import TO_STAGE_RESPONSE_MOCK
+from authentik.flows.tests.test_executor import to_stage_response
 from authentik.flows.views.executor import SESSION_KEY_PLAN
 from authentik.stages.invitation.models import Invitation, InvitationStage
 from authentik.stages.invitation.stage import (
@@ -35,7 +35,7 @@ class TestUserLoginStage(FlowTestCase):
 
     @patch(
         "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
+        to_stage_response,
     )
     def test_without_invitation_fail(self):
         """Test without any invitation, continue_flow_without_invitation not set."""
@@ -9,7 +9,7 @@ from authentik.flows.markers import StageMarker
 from authentik.flows.models import FlowDesignation, FlowStageBinding
 from authentik.flows.planner import PLAN_CONTEXT_PENDING_USER, FlowPlan
 from authentik.flows.tests import FlowTestCase
-from authentik.flows.tests.test_executor import TO_STAGE_RESPONSE_MOCK
+from authentik.flows.tests.test_executor import to_stage_response
 from authentik.flows.views.executor import SESSION_KEY_PLAN
 from authentik.stages.user_login.models import UserLoginStage
 
@@ -77,7 +77,7 @@ class TestUserLoginStage(FlowTestCase):
 
     @patch(
         "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
+        to_stage_response,
     )
     def test_without_user(self):
         """Test a plan without any pending user, resulting in a denied"""
@@ -12,7 +12,7 @@ from authentik.flows.markers import StageMarker
 from authentik.flows.models import FlowStageBinding
 from authentik.flows.planner import PLAN_CONTEXT_PENDING_USER, FlowPlan
 from authentik.flows.tests import FlowTestCase
-from authentik.flows.tests.test_executor import TO_STAGE_RESPONSE_MOCK
+from authentik.flows.tests.test_executor import to_stage_response
 from authentik.flows.views.executor import SESSION_KEY_PLAN
 from authentik.stages.prompt.stage import PLAN_CONTEXT_PROMPT
 from authentik.stages.user_write.models import UserWriteStage
@@ -97,7 +97,7 @@ class TestUserWriteStage(FlowTestCase):
 
     @patch(
         "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
+        to_stage_response,
     )
     def test_without_data(self):
         """Test without data results in error"""
@@ -118,7 +118,7 @@ class TestUserWriteStage(FlowTestCase):
 
     @patch(
         "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
+        to_stage_response,
     )
     def test_blank_username(self):
         """Test with blank username results in error"""
@@ -144,7 +144,7 @@ class TestUserWriteStage(FlowTestCase):
 
     @patch(
         "authentik.flows.views.executor.to_stage_response",
-        TO_STAGE_RESPONSE_MOCK,
+        to_stage_response,
     )
     def test_duplicate_data(self):
         """Test with duplicate data, should trigger error"""
@@ -26,6 +26,8 @@ warnings.filterwarnings(
 defuse_stdlib()
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "test":
+        os.environ.setdefault("DJANGO_SETTINGS_MODULE", "authentik.root.test_settings")
     os.environ.setdefault("DJANGO_SETTINGS_MODULE", "authentik.root.settings")
     try:
         from django.core.management import execute_from_command_line